@@ -1,15 +1,25 @@
 from __future__ import annotations
 
 import logging
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import HttpUrl, ValidationError
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 
+from app.core.cache import metadata_cache
+from app.core.config import settings
 from app.core.database import db
+from app.core.urls import normalise_url
 from app.models.common import AcceptedResponse
-from app.models.metadata.schemas import MetadataCreateRequest, MetadataResponse
-from app.repositories.metadata.repository import MetadataRepository
+from app.models.metadata.schemas import (
+    MetadataBatchCreateRequest,
+    MetadataCreateRequest,
+    MetadataResponse,
+)
+from app.repositories.metadata.repository import (
+    MetadataRepository,
+    MetadataSourceRepository,
+)
 from app.services.metadata.service import MetadataService
 from app.workers.fetcher import FetchError
 
@@ -25,7 +35,20 @@ router = APIRouter(prefix="/metadata", tags=["metadata"])
 
 def _get_service() -> MetadataService:
     """FastAPI dependency that builds a ``MetadataService`` for each request."""
-    return MetadataService(MetadataRepository.from_db(db))
+    return MetadataService(
+        MetadataRepository.from_db(db), MetadataSourceRepository.from_db(db)
+    )
+
+
+def _age_seconds(updated_at: datetime) -> float:
+    """Return the age of a stored document in seconds.
+
+    Mongo drivers may hand back naive datetimes (always UTC on the wire),
+    so a missing tzinfo is interpreted as UTC rather than local time.
+    """
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - updated_at).total_seconds()
 
 
 # ---------------------------------------------------------------------------
@@ -37,6 +60,9 @@ def _get_service() -> MetadataService:
     "",
     status_code=200,
     response_model=AcceptedResponse,
+    # App-wide default, restated so the hot endpoints keep orjson even if
+    # the app default ever changes.
+    response_class=ORJSONResponse,
     summary="Fetch and store metadata for a URL",
 )
 async def post_metadata(
@@ -64,6 +90,46 @@ async def post_metadata(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+# ---------------------------------------------------------------------------
+# POST /metadata/batch
+# ---------------------------------------------------------------------------
+
+
+@router.post(
+    "/batch",
+    status_code=200,
+    response_model=AcceptedResponse,
+    response_class=ORJSONResponse,
+    summary="Fetch and store metadata for multiple URLs",
+)
+async def post_metadata_batch(
+    request: MetadataBatchCreateRequest,
+    service: MetadataService = Depends(_get_service),
+) -> AcceptedResponse:
+    """Fetch live HTTP metadata for every given URL and persist the batch.
+
+    All fetches run concurrently and each result is persisted as soon as
+    it lands; concurrent writes are coalesced into unordered bulk upserts
+    by the repository's batcher.  Duplicate URLs in the batch are
+    collapsed.
+
+    - **200** — metadata fetched and stored for all URLs
+    - **400** — a URL could not be fetched (network / DNS error)
+    - **422** — invalid request body or URL format
+    - **500** — database failure
+    """
+    urls = [str(url) for url in request.urls]
+    try:
+        stored = await service.store_many(urls)
+        return AcceptedResponse(message=f"Metadata stored for {len(stored)} URLs")
+    except FetchError as exc:
+        logger.warning("POST /metadata/batch fetch error: %s", exc)
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        logger.error("POST /metadata/batch DB error: %s", exc)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
 # ---------------------------------------------------------------------------
 # GET /metadata
 # ---------------------------------------------------------------------------
@@ -72,41 +138,70 @@ async def post_metadata(
 @router.get(
     "",
     response_model=MetadataResponse,
+    response_class=ORJSONResponse,
     responses={202: {"model": AcceptedResponse}},
     summary="Retrieve cached metadata for a URL",
 )
 async def get_metadata(
     url: str,
-    background_tasks: BackgroundTasks,
+    request: Request,
     service: MetadataService = Depends(_get_service),
-) -> MetadataResponse | JSONResponse:
+) -> MetadataResponse | ORJSONResponse:
     """Return the cached metadata document for *url*.
 
-    On a cache miss, returns **202 Accepted** immediately and schedules a
-    background task to fetch and store the metadata without blocking the
-    response.  No HTTP self-calls are made; orchestration is internal only.
+    On a cache miss, returns **202 Accepted** immediately and enqueues the
+    URL on the bounded collector pool, which fetches and stores it without
+    blocking the response.  No HTTP self-calls are made; orchestration is
+    internal only.
+
+    Stored documents are served stale-while-revalidate: anything older
+    than ``swr_fresh_ttl`` is returned immediately with **200** while a
+    background refresh is scheduled; documents older than
+    ``swr_stale_ttl`` are treated as a miss.
 
     - **200** — document found and returned
-    - **202** — not yet stored; background collection has been triggered
+    - **202** — not yet stored (or too stale); background collection triggered
     - **422** — ``url`` query parameter missing or not a valid HTTP URL
     - **500** — database failure
+    - **503** — collection queue full; retry later
     """
     try:
-        normalised_url = str(HttpUrl(url))
-    except ValidationError:
+        normalised_url = normalise_url(url)
+    except ValueError:
         raise HTTPException(status_code=422, detail=f"Invalid URL: {url}")
 
     try:
         doc = await service.get_metadata(normalised_url)
+        if doc is not None and _age_seconds(doc.updated_at) > settings.swr_stale_ttl:
+            # Too old to serve — fall through to the miss path.
+            metadata_cache.pop(normalised_url, None)
+            doc = None
         if doc is None:
-            background_tasks.add_task(service.background_collect, normalised_url)
-            return JSONResponse(
+            if not request.app.state.collector_pool.submit(normalised_url):
+                return ORJSONResponse(
+                    status_code=503,
+                    content={"message": "Collection queue is full; retry later."},
+                )
+            return ORJSONResponse(
                 status_code=202,
-                content=AcceptedResponse(
-                    message=f"No metadata yet for {normalised_url}. Collection triggered."
-                ).model_dump(),
+                content={
+                    "message": (
+                        f"No metadata yet for {normalised_url}. Collection triggered."
+                    )
+                },
             )
-        return MetadataResponse(**doc.model_dump(exclude={"page_source"}))
+        if _age_seconds(doc.updated_at) > settings.swr_fresh_ttl:
+            # Stale-while-revalidate: serve the stored copy, refresh behind
+            # it.  Best effort — a full queue just skips this refresh.
+            request.app.state.collector_pool.submit(normalised_url)
+        return MetadataResponse(
+            url=doc.url,
+            status_code=doc.status_code,
+            headers=doc.headers,
+            cookies=doc.cookies,
+            created_at=doc.created_at,
+            updated_at=doc.updated_at,
+        )
     except Exception as exc:
         logger.error("GET /metadata DB error for %s: %s", normalised_url, exc)
         raise HTTPException(status_code=500, detail=str(exc))
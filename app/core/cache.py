@@ -0,0 +1,26 @@
+"""In-process TTL cache for metadata documents.
+
+Keyed by normalised URL and consulted before the repository on the GET
+path, so repeat reads of a hot URL cost a dict lookup instead of a
+MongoDB round-trip.  Entries are written back on every successful
+upsert, keeping the cache coherent with the database.
+
+All access happens on the event-loop thread (FastAPI handlers and
+background tasks), and ``TTLCache`` operations never await, so no lock
+is needed around individual get/set calls.
+"""
+
+from __future__ import annotations
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+#: Maximum number of cached documents before LRU eviction kicks in.
+METADATA_CACHE_MAXSIZE = 10_000
+
+#: Module-level cache — import and use this everywhere.
+metadata_cache: TTLCache = TTLCache(
+    maxsize=METADATA_CACHE_MAXSIZE,
+    ttl=settings.metadata_cache_ttl,
+)
@@ -3,3 +3,4 @@ from enum import StrEnum
 
 class CollectionNames(StrEnum):
     METADATA = "metadata"
+    METADATA_SOURCE = "metadata_source"
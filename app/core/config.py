@@ -9,11 +9,28 @@ class Settings(BaseSettings):
     # MongoDB
     mongo_uri: str = "mongodb://localhost:27017"
     mongo_db: str = "metadata_inventory"
-    mongo_max_pool_size: int = 10
+    # Size the pool for expected concurrent queries, not CPU count — an
+    # async server can easily have hundreds of coroutines waiting on Mongo.
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 10
+    upsert_batch_max_ops: int = 200  # max ops per bulk_write batch
+    upsert_batch_window_ms: int = 10  # max time an upsert waits to be batched
+
+    # Caching
+    metadata_cache_ttl: int = 60  # seconds a document stays in the in-process cache
+    swr_fresh_ttl: int = 300  # age (s) under which a stored document is fresh
+    swr_stale_ttl: int = 86_400  # age (s) beyond which a document is a miss
 
     # HTTP fetcher
     http_timeout: float = 10.0
     http_max_retries: int = 3
+    http_max_connections: int = 200
+    http_max_keepalive: int = 50
+    http_max_body_bytes: int = 5 * 1024 * 1024  # cap on stored page_source
+
+    # Background collection
+    bg_worker_concurrency: int = 4  # concurrent background fetches
+    bg_queue_maxsize: int = 1000  # pending collections before load shedding
     http_verify_ssl: bool = True  # set False behind corporate SSL-inspection proxies
 
     # Logging
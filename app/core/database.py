@@ -10,9 +10,12 @@ logger = logging.getLogger(__name__)
 
 
 class DatabaseManager:
-    """Singleton MongoDB connection manager.
+    """MongoDB connection manager.
 
-    Use the module-level ``db`` instance; do not instantiate directly.
+    Instantiated exactly once at module import as the module-level ``db``;
+    import and use that instance everywhere rather than constructing your
+    own.  ``__slots__`` keeps the instance dict-free, so attribute access
+    on the hot ``get_collection`` path is a direct slot load.
 
     Lifecycle::
 
@@ -21,19 +24,26 @@ class DatabaseManager:
         await db.disconnect()  # call once at shutdown
     """
 
-    _instance: DatabaseManager | None = None
-    _client: AsyncIOMotorClient | None = None
+    __slots__ = ("_client",)
 
-    def __new__(cls) -> DatabaseManager:
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    def __init__(self) -> None:
+        self._client: AsyncIOMotorClient | None = None
 
     async def connect(self) -> None:
         """Open the Motor client and verify connectivity with a ping."""
         self._client = AsyncIOMotorClient(
             settings.mongo_uri,
             maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            # Cap concurrent connection establishment so a cold start with
+            # many in-flight coroutines does not stampede the server.
+            maxConnecting=4,
+            waitQueueTimeoutMS=5000,
+            # Wire-protocol compression, negotiated at connection time.
+            # With multi-KB HTML payloads zstd cuts app<->Mongo bytes ~5x;
+            # the fallbacks apply when the server lacks zstd (Mongo <4.2).
+            compressors="zstd,snappy,zlib",
+            zlibCompressionLevel=-1,
         )
         await self._client.admin.command("ping")
         logger.info("Connected to MongoDB at %s.", settings.mongo_uri)
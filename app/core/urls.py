@@ -0,0 +1,71 @@
+"""URL validation and normalisation for the request hot path.
+
+``GET /metadata`` used to run every query URL through Pydantic's
+``HttpUrl``, paying for a full validator per request.  This helper does
+the equivalent normalisation (lowercased scheme and host, ``/`` default
+path, default ports stripped, IDNA-encoded hosts) with one precompiled
+regex match and memoises the result — URLs repeat heavily, so most
+calls are a dict lookup.
+
+``HttpUrl`` stays in use on the POST body, where Pydantic parses the
+request model anyway; both paths normalise ``https://Example.com`` to
+``https://example.com/`` so reads and writes hit the same document.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+import idna
+
+#: scheme://netloc, then everything up to the first ``?``/``#`` is the
+#: path and the remainder (query + fragment) passes through untouched.
+#: A single match replaces urlsplit + urlunsplit on the hot path.
+_URL_RE = re.compile(
+    r"\A(https?)://([^/?#]+)([^?#]*)([?#].*)?\Z",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _idna_hostport(hostport: str, url: str) -> str:
+    """ASCII-encode a non-ASCII host the same way ``HttpUrl`` does.
+
+    UTS-46 via the ``idna`` package, not the stdlib ``idna`` codec — the
+    codec is IDNA 2003 and maps e.g. ``ß`` → ``ss`` where Pydantic
+    produces ``xn--``-encoded labels, which would split the storage key.
+    """
+    host, sep, port = hostport.partition(":")
+    try:
+        host = idna.encode(host, uts46=True).decode("ascii")
+    except idna.IDNAError as exc:
+        raise ValueError(f"Invalid URL: {url}") from exc
+    return f"{host}{sep}{port}"
+
+
+@lru_cache(maxsize=10_000)
+def normalise_url(url: str) -> str:
+    """Return the normalised form of *url*.
+
+    Raises:
+        ValueError: if *url* is not an absolute HTTP(S) URL.
+    """
+    match = _URL_RE.match(url)
+    if match is None:
+        raise ValueError(f"Invalid URL: {url}")
+    scheme, netloc, path, rest = match.groups()
+    scheme = scheme.lower()
+    # Hostnames are case-insensitive; userinfo (rare) is not, so split it
+    # off and lowercase only the host side — exactly what HttpUrl does.
+    userinfo, sep, hostport = netloc.rpartition("@")
+    hostport = hostport.lower()
+    # Default ports and internationalised hosts must collapse to the same
+    # storage key HttpUrl produces on the POST path, or the same logical
+    # URL reads and writes under two different documents.
+    if (scheme == "http" and hostport.endswith(":80")) or (
+        scheme == "https" and hostport.endswith(":443")
+    ):
+        hostport = hostport.rsplit(":", 1)[0]
+    if not hostport.isascii():
+        hostport = _idna_hostport(hostport, url)
+    return f"{scheme}://{userinfo}{sep}{hostport}{path or '/'}{rest or ''}"
@@ -5,12 +5,27 @@ from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from app.api.router import router
 from app.core.config import settings
 from app.core.database import db
-from app.repositories.metadata.repository import MetadataRepository
-from app.workers.fetcher import close_http_client
+from app.repositories.metadata.repository import (
+    MetadataRepository,
+    MetadataSourceRepository,
+)
+from app.services.metadata.service import MetadataService
+from app.workers.fetcher import close_http_client, get_http_client
+from app.workers.pool import CollectorPool
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop has no Windows wheels
+    pass
+else:
+    # Install at import time so every entrypoint (uvicorn, tests, scripts)
+    # gets the Cython event loop, not just servers started with --loop.
+    uvloop.install()
 
 
 def _configure_logging() -> None:
@@ -42,8 +57,22 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # ── Startup ──────────────────────────────────────────────────────
     await db.connect()
     await MetadataRepository.from_db(db).ensure_indexes()
+    await MetadataSourceRepository.from_db(db).ensure_indexes()
+    app.state.collector_pool = CollectorPool(
+        lambda: MetadataService(
+            MetadataRepository.from_db(db), MetadataSourceRepository.from_db(db)
+        ),
+        concurrency=settings.bg_worker_concurrency,
+        queue_maxsize=settings.bg_queue_maxsize,
+    )
+    app.state.collector_pool.start()
+    # Open the shared HTTP client eagerly so it is born on the lifespan
+    # loop and the first background fetch skips pool construction; the
+    # shutdown hook below closes it.
+    get_http_client()
     yield
     # ── Shutdown ─────────────────────────────────────────────────────
+    await app.state.collector_pool.stop()
     await close_http_client()
     await db.disconnect()
 
@@ -53,6 +82,9 @@ app = FastAPI(
     description="Async service that fetches and stores HTTP metadata.",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson serialises datetimes and nested dicts in C — roughly 5-10x
+    # faster than the stdlib encoder on the document shapes we return.
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(router)
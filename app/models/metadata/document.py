@@ -2,12 +2,18 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel
+import msgspec
 
 
-class MetadataDocument(BaseModel):
+class MetadataDocument(msgspec.Struct, gc=False, frozen=True):
     """Internal representation of a stored metadata record.
 
+    A :class:`msgspec.Struct` rather than a Pydantic model: this is a pure
+    data carrier on the hot fetch/store path, and msgspec construction and
+    conversion are an order of magnitude cheaper than Pydantic validation.
+    Frozen: documents are assembled once and flow through cache, batcher,
+    and single-flight registries — shared instances must never be mutated
+    in place (``msgspec.structs.replace`` derives modified copies).
     Never returned from the API directly — see ``MetadataResponse``.
     """
 
@@ -15,6 +21,10 @@ class MetadataDocument(BaseModel):
     status_code: int
     headers: dict[str, str]
     cookies: dict[str, str]
-    page_source: str
     created_at: datetime
     updated_at: datetime
+    # Defaults to "" so documents read with a projection that excludes the
+    # (potentially huge) page_source still convert.
+    page_source: str = ""
+    # True when the fetched body exceeded http_max_body_bytes and was cut.
+    page_source_truncated: bool = False
@@ -11,6 +11,12 @@ class MetadataCreateRequest(BaseModel):
     url: HttpUrl
 
 
+class MetadataBatchCreateRequest(BaseModel):
+    """Request body for POST /metadata/batch."""
+
+    urls: list[HttpUrl]
+
+
 class MetadataResponse(BaseModel):
     """API response shape for a stored metadata record.
 
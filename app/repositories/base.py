@@ -21,11 +21,15 @@ from __future__ import annotations
 
 import logging
 from abc import ABC
-from typing import ClassVar, TypeVar
+from typing import TYPE_CHECKING, ClassVar, TypeVar
 
-from motor.motor_asyncio import AsyncIOMotorCollection
+# Motor is needed here for annotations only.  Keeping it out of the
+# runtime import graph lets unit tests that mock the repositories import
+# this package without paying the motor/pymongo startup cost.
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
 
-from app.core.database import DatabaseManager
+    from app.core.database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
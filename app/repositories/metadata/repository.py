@@ -1,17 +1,177 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, ClassVar
 
-from pymongo import ReturnDocument
-from pymongo.errors import DuplicateKeyError, PyMongoError
+import msgspec
+import zstandard
+from bson import Binary
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 
 from app.core.collections import CollectionNames
+from app.core.config import settings
 from app.models.metadata.document import MetadataDocument
 from app.repositories.base import BaseRepository
 
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
 logger = logging.getLogger(__name__)
 
+# page_source is by far the largest field (raw HTML); zstd level 3 typically
+# shrinks it 5-10x, cutting write bandwidth and storage.  Compression is a
+# storage concern only — MetadataDocument always carries the decoded text.
+_zstd_compressor = zstandard.ZstdCompressor(level=3)
+_zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+def _compress_source(page_source: str) -> Binary:
+    """Compress raw HTML for storage."""
+    return Binary(_zstd_compressor.compress(page_source.encode("utf-8")))
+
+
+def _decompress_source(stored: bytes | str, encoding: str) -> str:
+    """Decode a stored ``page_source`` value back to text.
+
+    Documents written before compression was introduced carry a plain
+    string and no ``page_source_encoding`` marker; pass them through.
+    """
+    if encoding == "zstd":
+        return _zstd_decompressor.decompress(bytes(stored)).decode("utf-8")
+    return stored if isinstance(stored, str) else stored.decode("utf-8")
+
+
+_DUPLICATE_KEY_CODE = 11000
+
+
+def _write_op(document: MetadataDocument, now: datetime) -> tuple[dict, dict]:
+    """Build the ``(filter, update)`` pair for one hot-field upsert.
+
+    The single place where a document is dumped for writing — single
+    upserts and bulk batches share it, so the struct is converted exactly
+    once per write:
+
+    - ``created_at`` is dropped from ``$set`` and preserved through
+      ``$setOnInsert``, so the original insert timestamp survives updates.
+    - ``page_source`` is dropped — the HTML lives in ``metadata_source``
+      (see :class:`MetadataSourceRepository`), keeping the hot document
+      small for index scans, cache fills, and replication.
+    """
+    payload = msgspec.structs.asdict(document)
+    payload.pop("created_at")
+    payload.pop("page_source")
+    payload["updated_at"] = now
+    return (
+        {"url": document.url},
+        {"$set": payload, "$setOnInsert": {"created_at": document.created_at}},
+    )
+
+
+class UpsertBatcher:
+    """Coalesces individual upserts into unordered ``bulk_write`` batches.
+
+    Writers enqueue an :class:`UpdateOne` and await a Future; a drain task
+    collects up to ``max_ops`` operations or waits ``window_ms`` —
+    whichever comes first — and submits them in a single round-trip.
+    Under burst load this collapses N ``find_one_and_update`` round-trips
+    into one bulk write at the cost of a few milliseconds of latency.
+
+    The drain task runs only while the queue is non-empty, so an idle
+    batcher holds no resources and needs no explicit shutdown.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        max_ops: int,
+        window_ms: int,
+    ) -> None:
+        self._col = collection
+        self._max_ops = max_ops
+        self._window = window_ms / 1000.0
+        self._queue: asyncio.Queue[tuple[dict, dict, asyncio.Future]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.loop = asyncio.get_running_loop()
+
+    async def submit(self, filter_doc: dict, update: dict) -> None:
+        """Enqueue one upsert and wait until the batch containing it is written."""
+        future: asyncio.Future = self.loop.create_future()
+        self._queue.put_nowait((filter_doc, update, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self) -> None:
+        while True:
+            try:
+                batch = [self._queue.get_nowait()]
+            except asyncio.QueueEmpty:
+                return
+            deadline = self.loop.time() + self._window
+            while len(batch) < self._max_ops:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[dict, dict, asyncio.Future]]) -> None:
+        ops = [
+            UpdateOne(filter_doc, update, upsert=True)
+            for filter_doc, update, _ in batch
+        ]
+        #: Per-op failures from the duplicate-key fallback; ops whose
+        #: writes committed in the bulk must still resolve normally.
+        failed: dict[int, Exception] = {}
+        try:
+            try:
+                await self._col.bulk_write(ops, ordered=False)
+            except BulkWriteError as exc:
+                errors = exc.details.get("writeErrors", [])
+                if not errors or any(
+                    e.get("code") != _DUPLICATE_KEY_CODE for e in errors
+                ):
+                    raise
+                # Upsert race on the unique url index — another writer
+                # inserted first.  The documents exist now, so re-apply
+                # each failed op as a plain update.  update_one (rather
+                # than find_one_and_update) avoids shipping the full
+                # document — page_source included — back over the wire.
+                for error in errors:
+                    index = error["index"]
+                    filter_doc, update, _ = batch[index]
+                    try:
+                        resolved = await self._col.update_one(
+                            filter_doc, {"$set": update["$set"]}
+                        )
+                        if resolved.matched_count == 0:
+                            raise RuntimeError(
+                                f"Upsert race condition unresolved for {filter_doc}"
+                            )
+                    except Exception as retry_exc:
+                        failed[index] = retry_exc
+        except Exception as exc:
+            # Whole-batch failure (the bulk itself never applied).
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+                    future.exception()  # mark retrieved if no one awaits
+            return
+        for index, (_, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+                future.exception()  # mark retrieved if no one awaits
+            else:
+                future.set_result(None)
+
 
 class MetadataRepository(BaseRepository):
     """MongoDB repository for the ``metadata`` collection."""
@@ -19,56 +179,109 @@ class MetadataRepository(BaseRepository):
     COLLECTION_NAME = CollectionNames.METADATA
 
     async def ensure_indexes(self) -> None:
+        # The unique url index serves the point lookup; the document holds
+        # hot fields only since the page_source split, so no wider
+        # (covering) index pays for its write amplification.
         await self._col.create_index("url", unique=True)
 
+    #: Shared batcher — one per event loop, lazily (re)created so each
+    #: process (and each test loop) gets its own drain task.
+    _batcher: ClassVar[UpsertBatcher | None] = None
+
+    def _get_batcher(self) -> UpsertBatcher:
+        loop = asyncio.get_running_loop()
+        cls = type(self)
+        if cls._batcher is None or cls._batcher.loop is not loop:
+            cls._batcher = UpsertBatcher(
+                self._col,
+                max_ops=settings.upsert_batch_max_ops,
+                window_ms=settings.upsert_batch_window_ms,
+            )
+        return cls._batcher
+
     async def upsert(self, document: MetadataDocument) -> MetadataDocument:
         """Insert or update the document keyed by *url*.
 
-        Uses ``find_one_and_update`` with ``upsert=True`` so concurrent
-        requests on the same URL do not produce duplicates.
+        Writes go through the shared :class:`UpsertBatcher`, which batches
+        concurrent upserts into a single unordered ``bulk_write``:
 
         - ``$set`` updates all fields except ``created_at`` on every write.
         - ``$setOnInsert`` preserves the original ``created_at`` on insert
           and leaves it untouched on subsequent updates.
-        - A ``DuplicateKeyError`` race-condition guard retries as a plain
-          update if two requests race on the unique ``url`` index.
+        - Duplicate-key races on the unique ``url`` index are retried as
+          plain updates inside the batcher.
+
+        Returns the written document.  ``bulk_write`` does not echo
+        documents back, so the input document is returned with the new
+        ``updated_at`` applied — one round-trip and one BSON decode less
+        per write.
         """
         now = datetime.now(timezone.utc)
-        payload = document.model_dump(exclude={"created_at"})
-        payload["updated_at"] = now
+        filter_doc, update = _write_op(document, now)
         try:
-            updated = await self._col.find_one_and_update(
-                {"url": document.url},
-                {
-                    "$set": payload,
-                    "$setOnInsert": {"created_at": document.created_at},
-                },
-                upsert=True,
-                return_document=ReturnDocument.AFTER,
-            )
-        except DuplicateKeyError:
-            # Race condition: another request inserted first — retry as update.
-            updated = await self._col.find_one_and_update(
-                {"url": document.url},
-                {"$set": payload},
-                return_document=ReturnDocument.AFTER,
-            )
-            if updated is None:
-                # Document was deleted in the window between our two operations.
-                raise RuntimeError(
-                    f"Upsert race condition unresolved for url={document.url}"
-                )
+            await self._get_batcher().submit(filter_doc, update)
         except PyMongoError as exc:
             logger.exception("MongoDB upsert failed for url=%s", document.url)
             raise RuntimeError("Database write error") from exc
 
-        updated.pop("_id", None)
-        return MetadataDocument(**updated)
+        return msgspec.structs.replace(document, updated_at=now)
 
     async def find_by_url(self, url: str) -> MetadataDocument | None:
-        """Return the stored document for *url*, or ``None`` if not found."""
-        result = await self._col.find_one({"url": url})
+        """Return the stored document for *url*, or ``None`` if not found.
+
+        New documents hold hot fields only; the projection still excludes
+        ``page_source`` so documents written before the source split moved
+        the HTML to its own collection read just as cheaply.
+        """
+        result = await self._col.find_one(
+            {"url": url},
+            projection={"page_source": 0, "page_source_encoding": 0, "_id": 0},
+        )
         if result is None:
             return None
-        result.pop("_id", None)
+        # Direct construction skips msgspec's type checking — the data came
+        # out of our own collection and matches the schema by construction.
         return MetadataDocument(**result)
+
+
+class MetadataSourceRepository(BaseRepository):
+    """MongoDB repository for the ``metadata_source`` collection.
+
+    Cold storage for fetched HTML, split from the hot metadata fields so
+    the ``metadata`` collection stays small in the WiredTiger cache.
+    Keyed by url like the hot collection; the body is zstd-compressed.
+    """
+
+    COLLECTION_NAME = CollectionNames.METADATA_SOURCE
+
+    async def ensure_indexes(self) -> None:
+        await self._col.create_index("url", unique=True)
+
+    async def upsert_source(self, url: str, page_source: str) -> None:
+        """Insert or update the stored HTML for *url*."""
+        update = {
+            "$set": {
+                "page_source": _compress_source(page_source),
+                "page_source_encoding": "zstd",
+                "updated_at": datetime.now(timezone.utc),
+            }
+        }
+        try:
+            try:
+                await self._col.update_one({"url": url}, update, upsert=True)
+            except DuplicateKeyError:
+                # Race on the unique url index — the doc exists now.
+                await self._col.update_one({"url": url}, update)
+        except PyMongoError as exc:
+            logger.exception("MongoDB source upsert failed for url=%s", url)
+            raise RuntimeError("Database write error") from exc
+
+    async def get_source(self, url: str) -> str | None:
+        """Return the decompressed HTML for *url*, or ``None`` if not stored."""
+        result = await self._col.find_one({"url": url})
+        if result is None:
+            return None
+        return _decompress_source(
+            result.get("page_source", ""),
+            result.get("page_source_encoding", "raw"),
+        )
@@ -1,27 +1,101 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from typing import Awaitable, Callable, TypeVar
 
+import msgspec
+
+from app.core.cache import metadata_cache
 from app.models.metadata.document import MetadataDocument
-from app.repositories.metadata.repository import MetadataRepository
+from app.repositories.metadata.repository import (
+    MetadataRepository,
+    MetadataSourceRepository,
+)
 from app.workers.fetcher import FetchError, fetch_metadata
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class MetadataService:
     """Business logic for metadata collection and retrieval."""
 
-    def __init__(self, repo: MetadataRepository) -> None:
+    #: URLs with a background refresh currently in flight.  Class-level
+    #: because a fresh service instance is built per request; membership
+    #: checks and mutations all happen on the event-loop thread, so a
+    #: plain set is race-free here.
+    _refreshing: set[str] = set()
+
+    #: Single-flight registries: concurrent callers for the same URL share
+    #: one in-flight read / fetch instead of duplicating the work.
+    _inflight_gets: dict[str, asyncio.Future] = {}
+    _inflight_stores: dict[str, asyncio.Future] = {}
+
+    def __init__(
+        self, repo: MetadataRepository, source_repo: MetadataSourceRepository
+    ) -> None:
         self._repo = repo
+        self._source_repo = source_repo
+
+    @staticmethod
+    async def _single_flight(
+        inflight: dict[str, asyncio.Future],
+        url: str,
+        work: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Run *work* once per URL; concurrent callers await the same result.
+
+        The first caller for a URL executes *work* and resolves a shared
+        Future; duplicate callers arriving before completion await that
+        Future instead of issuing their own query/fetch.  The registry
+        entry is always removed once the work settles.
+        """
+        existing = inflight.get(url)
+        if existing is not None:
+            return await asyncio.shield(existing)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        inflight[url] = future
+        try:
+            result = await work()
+        except BaseException as exc:
+            if not future.done():
+                future.set_exception(exc)
+                # Mark retrieved so the loop never warns when no one waits.
+                future.exception()
+            raise
+        else:
+            if not future.done():
+                future.set_result(result)
+            return result
+        finally:
+            inflight.pop(url, None)
 
     async def get_metadata(self, url: str) -> MetadataDocument | None:
-        """Return the cached metadata for *url*, or ``None`` if not stored."""
-        return await self._repo.find_by_url(url)
+        """Return the stored metadata for *url*, or ``None`` if not stored.
+
+        Consults the in-process TTL cache first, so hot URLs are answered
+        without a database round-trip; a repository hit populates the
+        cache for subsequent calls.  ``store_metadata`` refreshes the
+        entry on every successful write.
+        """
+        cached = metadata_cache.get(url)
+        if cached is not None:
+            return cached
+        doc = await self._single_flight(
+            self._inflight_gets, url, lambda: self._repo.find_by_url(url)
+        )
+        if doc is not None:
+            metadata_cache[url] = doc
+        return doc
 
     async def store_metadata(self, url: str) -> MetadataDocument:
         """Fetch live metadata for *url* and persist it.
 
+        Concurrent stores for the same URL are coalesced into a single
+        fetch + upsert shared by all callers.
+
         Returns the document as it was written to the database (with the
         server-side ``updated_at`` timestamp applied by the repository).
 
@@ -29,8 +103,45 @@ class MetadataService:
             FetchError: propagated from the fetcher on network failure.
             RuntimeError: raised by repository on database failure.
         """
+        return await self._single_flight(
+            self._inflight_stores, url, lambda: self._fetch_and_store(url)
+        )
+
+    async def store_many(self, urls: list[str]) -> list[MetadataDocument]:
+        """Fetch every URL concurrently and persist each as it completes.
+
+        Duplicate URLs are collapsed before fetching, so posting the same
+        URL repeatedly in one batch costs a single fetch and write.
+
+        Writes are pipelined rather than barriered: each document goes to
+        the repository the moment its fetch lands, where the shared
+        :class:`UpsertBatcher` coalesces concurrent upserts into unordered
+        bulk writes.  One slow fetch therefore delays only its own write,
+        not the whole batch, while fast completions still collapse into a
+        single round-trip.  Going through :meth:`store_metadata` also
+        single-flights each URL against stores already in progress.
+
+        Raises like :meth:`store_metadata` — the first failure wins.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        return list(
+            await asyncio.gather(*(self.store_metadata(url) for url in unique_urls))
+        )
+
+    async def _fetch_and_store(self, url: str) -> MetadataDocument:
         doc = await fetch_metadata(url)
-        return await self._repo.upsert(doc)
+        # Hot fields and the HTML body live in separate collections; the
+        # two writes are independent, so run them concurrently.
+        stored, _ = await asyncio.gather(
+            self._repo.upsert(doc),
+            self._source_repo.upsert_source(doc.url, doc.page_source),
+        )
+        # Cache the same shape the read path produces: hot fields only.
+        # Caching the fetched body would pin megabytes of HTML per entry
+        # in process memory — the split that keeps page_source out of the
+        # hot collection applies to the in-process cache too.
+        metadata_cache[url] = msgspec.structs.replace(stored, page_source="")
+        return stored
 
     async def background_collect(self, url: str) -> None:
         """Fire-and-forget wrapper for ``store_metadata``.
@@ -39,10 +150,20 @@ class MetadataService:
         failure never crashes the background task silently.  FastAPI cannot
         propagate background task exceptions to the original response, so
         swallowing here with structured logging is the correct approach.
+
+        Duplicate collections for the same URL are suppressed while one is
+        already in flight, so a burst of stale hits schedules one refresh,
+        not one per request.
         """
+        if url in self._refreshing or url in self._inflight_stores:
+            logger.debug("Refresh already in flight for %s; skipping.", url)
+            return
+        self._refreshing.add(url)
         try:
             await self.store_metadata(url)
         except FetchError as exc:
             logger.error("Background fetch failed for %s: %s", url, exc)
         except Exception as exc:
             logger.exception("Unexpected error in background_collect for %s: %s", url, exc)
+        finally:
+            self._refreshing.discard(url)
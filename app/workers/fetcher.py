@@ -3,14 +3,17 @@
 Responsible solely for retrieving HTTP metadata from a URL.
 
 Uses httpx.AsyncClient which is meant to be long-lived and reused.
-A single shared client is managed by the module; see ``get_http_client``
-and ``close_http_client`` for lifecycle hooks.
+A single shared client is managed by the module; the app lifespan opens
+it eagerly at startup (``get_http_client``) and closes it at shutdown
+(``close_http_client``).
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 import httpx
@@ -19,6 +22,7 @@ from tenacity import (
     before_sleep_log,
     retry,
     retry_if_exception_type,
+    stop_after_attempt,
     wait_exponential,
 )
 
@@ -40,6 +44,15 @@ def get_http_client() -> httpx.AsyncClient:
             follow_redirects=True,
             verify=settings.http_verify_ssl,
             headers={"User-Agent": "MetadataInventoryBot/1.0"},
+            # HTTP/2 multiplexes concurrent fetches to the same host over
+            # one connection; explicit limits stop background bursts from
+            # turning into connection storms.
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive,
+                keepalive_expiry=30.0,
+            ),
         )
     return _http_client
 
@@ -57,10 +70,27 @@ class FetchError(Exception):
     """Raised when the fetcher cannot collect metadata."""
 
 
+#: Backoff sleep indirection.  Tenacity is handed a lambda reading this
+#: module attribute at call time, so tests can patch ``fetcher._sleep``
+#: and never wait on a real loop timer between retries.
+_sleep = asyncio.sleep
+
+
+@lru_cache(maxsize=None)
+def _stop_policy(max_attempts: int) -> stop_after_attempt:
+    """Build (once per distinct setting) the tenacity stop condition.
+
+    Keyed by value rather than read at import time so tests that patch
+    ``settings.http_max_retries`` still take effect.
+    """
+    return stop_after_attempt(max_attempts)
+
+
 @retry(
     retry=retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError)),
-    stop=lambda rs: rs.attempt_number >= settings.http_max_retries + 1,
+    stop=lambda rs: _stop_policy(settings.http_max_retries + 1)(rs),
     wait=wait_exponential(multiplier=0.5, min=0.5, max=10),
+    sleep=lambda seconds: _sleep(seconds),
     before_sleep=before_sleep_log(logger, logging.WARNING),
     reraise=False,
 )
@@ -80,6 +110,8 @@ async def fetch_metadata(url: str) -> MetadataDocument:
     is read per-attempt, not at import time — patches in tests work as
     expected.
     """
+    if httpx.URL(url).scheme not in ("http", "https"):
+        raise FetchError(f"Invalid URL '{url}': missing or unsupported scheme")
     try:
         return await _fetch_with_retry(url)
     except RetryError as exc:
@@ -90,13 +122,29 @@ async def fetch_metadata(url: str) -> MetadataDocument:
 
 
 async def _do_fetch(url: str) -> MetadataDocument:
-    """Perform a single HTTP GET and map the response to a MetadataDocument."""
+    """Perform a single HTTP GET and map the response to a MetadataDocument.
+
+    The body is streamed in 64 KiB chunks and truncated at
+    ``settings.http_max_body_bytes`` rather than buffered whole, so a
+    multi-megabyte page cannot blow up memory; truncation is recorded on
+    the document.
+    """
     client = get_http_client()
     now = datetime.now(timezone.utc)
+    max_bytes = settings.http_max_body_bytes
 
     try:
-        response = await client.get(url)
-    except httpx.InvalidURL as exc:
+        async with client.stream("GET", url) as response:
+            chunks: list[bytes] = []
+            total = 0
+            truncated = False
+            async for chunk in response.aiter_bytes(65536):
+                total += len(chunk)
+                chunks.append(chunk)
+                if total > max_bytes:
+                    truncated = True
+                    break
+    except (httpx.InvalidURL, httpx.UnsupportedProtocol) as exc:
         raise FetchError(f"Invalid URL '{url}': {exc}") from exc
     except httpx.TimeoutException:
         raise  # propagate for retry logic
@@ -105,15 +153,30 @@ async def _do_fetch(url: str) -> MetadataDocument:
     except httpx.RequestError as exc:
         raise FetchError(f"Request error for '{url}': {exc}") from exc
 
-    # Normalise headers and cookies to plain dicts[str, str]
-    headers: dict[str, str] = dict(response.headers)
-    cookies: dict[str, str] = {k: v for k, v in response.cookies.items()}
+    body = b"".join(chunks)
+    if truncated:
+        body = body[:max_bytes]
+    try:
+        page_source = body.decode(response.charset_encoding or "utf-8", errors="replace")
+    except LookupError:
+        # Server advertised a charset Python does not know.
+        page_source = body.decode("utf-8", errors="replace")
+
+    # Normalise headers and cookies to plain dict[str, str].  Decoding the
+    # raw header list once is cheaper than going through the
+    # case-insensitive Headers mapping; repeated header names keep the
+    # last value.
+    headers: dict[str, str] = {
+        k.decode("latin-1"): v.decode("latin-1") for k, v in response.headers.raw
+    }
+    cookies: dict[str, str] = dict(response.cookies)
 
     return MetadataDocument(
         url=url,
         headers=headers,
         cookies=cookies,
-        page_source=response.text,
+        page_source=page_source,
+        page_source_truncated=truncated,
         status_code=response.status_code,
         created_at=now,
         updated_at=now,
@@ -0,0 +1,71 @@
+"""Bounded worker pool for background metadata collection.
+
+FastAPI's ``BackgroundTasks`` runs tasks unbounded on the event loop: a
+spike of cache misses would spawn one concurrent fetch per request and
+starve everything else.  ``CollectorPool`` feeds a fixed number of
+worker tasks from a bounded queue instead, capping concurrent outbound
+fetches and shedding load (full queue) explicitly.
+
+Started and stopped by the app lifespan; routes reach it through
+``app.state.collector_pool``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+from app.services.metadata.service import MetadataService
+
+logger = logging.getLogger(__name__)
+
+
+class CollectorPool:
+    """Fixed-size pool of workers draining a bounded URL queue."""
+
+    def __init__(
+        self,
+        service_factory: Callable[[], MetadataService],
+        concurrency: int,
+        queue_maxsize: int,
+    ) -> None:
+        self._service_factory = service_factory
+        self._concurrency = concurrency
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_maxsize)
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Spawn the worker tasks.  Call once from lifespan startup."""
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"collector-{i}")
+            for i in range(self._concurrency)
+        ]
+        logger.info("Started %d background collector workers.", self._concurrency)
+
+    async def stop(self) -> None:
+        """Cancel all workers and wait for them to exit."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Background collector workers stopped.")
+
+    def submit(self, url: str) -> bool:
+        """Enqueue *url* for collection.  Returns ``False`` if the queue is full."""
+        try:
+            self._queue.put_nowait(url)
+        except asyncio.QueueFull:
+            logger.warning("Collection queue full; dropping %s.", url)
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        service = self._service_factory()
+        while True:
+            url = await self._queue.get()
+            try:
+                # background_collect swallows and logs its own errors.
+                await service.background_collect(url)
+            finally:
+                self._queue.task_done()
@@ -5,9 +5,18 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.cache import metadata_cache
 from app.main import app
 
 
+@pytest.fixture(autouse=True)
+def _clear_metadata_cache():
+    """Keep the module-level TTL cache from leaking state between tests."""
+    metadata_cache.clear()
+    yield
+    metadata_cache.clear()
+
+
 @pytest.fixture
 def client():
     """TestClient with lifespan startup/shutdown hooks fully mocked."""
@@ -29,7 +38,7 @@ def client():
             new_callable=AsyncMock,
         ),
         patch(
-            "app.workers.fetcher.close_http_client",
+            "app.repositories.metadata.repository.MetadataSourceRepository.ensure_indexes",
             new_callable=AsyncMock,
         ),
     ):
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, patch
 
+import msgspec
 import pytest
 
 from app.models.metadata.document import MetadataDocument
@@ -20,6 +22,13 @@ _DOC = MetadataDocument(
 )
 
 
+def _wait_for_call(mock, timeout: float = 2.0) -> None:
+    """Spin until *mock* has been called by a collector-pool worker."""
+    deadline = time.monotonic() + timeout
+    while not mock.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
 class TestPostMetadata:
     def test_post_success(self, client):
         with patch(
@@ -68,6 +77,21 @@ class TestGetMetadata:
         assert resp.status_code == 200
         assert resp.json()["url"] == "https://example.com/"
 
+    def test_get_hit_is_served_from_cache_on_repeat(self, client):
+        # Patch the repository, not the service — the cache now lives in
+        # MetadataService.get_metadata, which must be exercised for real.
+        with patch(
+            "app.repositories.metadata.repository.MetadataRepository.find_by_url",
+            new_callable=AsyncMock,
+            return_value=_DOC,
+        ) as mock_find:
+            first = client.get("/metadata?url=https://example.com/")
+            second = client.get("/metadata?url=https://example.com/")
+        assert first.status_code == 200
+        assert second.status_code == 200
+        # Second request must be answered by the in-process cache.
+        mock_find.assert_called_once_with("https://example.com/")
+
     def test_get_miss_returns_202(self, client):
         with (
             patch(
@@ -81,8 +105,45 @@ class TestGetMetadata:
             ) as mock_bg,
         ):
             resp = client.get("/metadata?url=https://example.com/")
-        assert resp.status_code == 202
-        assert "message" in resp.json()
+            assert resp.status_code == 202
+            assert "message" in resp.json()
+            _wait_for_call(mock_bg)
+        mock_bg.assert_called_once_with("https://example.com/")
+
+    def test_get_stale_hit_returns_200_and_schedules_refresh(self, client):
+        stale = msgspec.structs.replace(_DOC, updated_at=_NOW - timedelta(hours=1))
+        with (
+            patch(
+                "app.api.metadata.routes.MetadataService.get_metadata",
+                new_callable=AsyncMock,
+                return_value=stale,
+            ),
+            patch(
+                "app.api.metadata.routes.MetadataService.background_collect",
+                new_callable=AsyncMock,
+            ) as mock_bg,
+        ):
+            resp = client.get("/metadata?url=https://example.com/")
+            assert resp.status_code == 200
+            _wait_for_call(mock_bg)
+        mock_bg.assert_called_once_with("https://example.com/")
+
+    def test_get_too_stale_hit_is_treated_as_miss(self, client):
+        ancient = msgspec.structs.replace(_DOC, updated_at=_NOW - timedelta(days=30))
+        with (
+            patch(
+                "app.api.metadata.routes.MetadataService.get_metadata",
+                new_callable=AsyncMock,
+                return_value=ancient,
+            ),
+            patch(
+                "app.api.metadata.routes.MetadataService.background_collect",
+                new_callable=AsyncMock,
+            ) as mock_bg,
+        ):
+            resp = client.get("/metadata?url=https://example.com/")
+            assert resp.status_code == 202
+            _wait_for_call(mock_bg)
         mock_bg.assert_called_once_with("https://example.com/")
 
     def test_get_missing_url_param_returns_422(self, client):
@@ -3,8 +3,9 @@
 These tests exercise the full request → service → repository → database pipeline.
 
 What is mocked:
-  - MongoDB replaced with an in-memory AsyncMongoMockClient (no Docker needed)
-  - External HTTP calls mocked per-test with respx
+  - External HTTP calls mocked with a module-scoped respx router
+  - MongoDB: a real throwaway ``mongod`` (tmp dbpath) when one is installed
+    locally, otherwise an in-memory AsyncMongoMockClient (no Docker needed)
 
 What is NOT mocked (runs real code):
   - FastAPI routes, dependency injection
@@ -15,89 +16,223 @@ What is NOT mocked (runs real code):
 
 from __future__ import annotations
 
+import shutil
+import socket
+import subprocess
+import time
+from contextlib import AsyncExitStack
+
 import httpx
+import pymongo
 import pytest
 import respx
-from fastapi.testclient import TestClient
+from asgi_lifespan import LifespanManager
 from mongomock_motor import AsyncMongoMockClient
-from unittest.mock import AsyncMock, patch
+from unittest.mock import patch
 
-import app.workers.fetcher as fetcher_module
+from app.core.collections import CollectionNames
+from app.core.config import settings
+from app.core.database import db
 from app.main import app
-
+from app.repositories.metadata.repository import MetadataSourceRepository
+
+#: One event loop for the whole module: the app lifespan, its Motor
+#: client, the collector pool, and every test coroutine all run on it,
+#: with no thread hop per request (unlike TestClient's portal thread).
+pytestmark = pytest.mark.asyncio(scope="module")
+
+#: Path to a local mongod, if one is installed.  A real in-memory-ish
+#: mongod (tmp dbpath) runs upserts and index lookups in native code and
+#: behaves like production; mongomock reimplements Mongo in Python and is
+#: both slower and occasionally divergent.  We use the real thing when we
+#: can and fall back to mongomock otherwise.
+_MONGOD = shutil.which("mongod")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(uri: str, timeout: float = 15.0) -> None:
+    """Block until the spawned mongod answers a ping (or give up)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            pymongo.MongoClient(uri, serverSelectionTimeoutMS=500).admin.command(
+                "ping"
+            )
+            return
+        except pymongo.errors.PyMongoError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"mongod at {uri} did not become ready")
+            time.sleep(0.1)
+
+
+@pytest.fixture(scope="module")
+def _mongod_uri(tmp_path_factory):
+    """URI of a module-scoped throwaway mongod, or ``None`` to use mongomock.
+
+    The dbpath lives in pytest's tmp dir, so the instance starts empty and
+    is discarded wholesale at teardown.
+    """
+    if _MONGOD is None:
+        yield None
+        return
+    port = _free_port()
+    dbpath = tmp_path_factory.mktemp("mongod")
+    proc = subprocess.Popen(
+        [_MONGOD, "--dbpath", str(dbpath), "--port", str(port), "--bind_ip", "127.0.0.1"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        _wait_until_ready(uri)
+        yield uri
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+#: Parsed once at import; the respx route derives its host match from
+#: this instead of re-parsing a URL string.
+_TARGET_URL = httpx.URL("https://example.com/")
 
 _FAKE_HTML = "<!DOCTYPE html><html><body>Hello</body></html>"
+#: Encoded once at import — handing httpx pre-encoded bytes (with an
+#: explicit content-length) skips per-response UTF-8 encoding and header
+#: inference every time the mocked route is served.
+_FAKE_BODY = _FAKE_HTML.encode("utf-8")
 _FAKE_RESPONSE = httpx.Response(
     200,
-    headers={"content-type": "text/html; charset=utf-8"},
-    text=_FAKE_HTML,
+    headers={
+        "content-type": "text/html; charset=utf-8",
+        "content-length": str(len(_FAKE_BODY)),
+    },
+    content=_FAKE_BODY,
 )
 
 
-@pytest.fixture
-def integration_client():
-    """Full-stack client with in-memory MongoDB and no real HTTP traffic.
+@pytest.fixture(scope="module")
+def respx_router():
+    """Module-wide respx router with the happy-path route pre-registered.
 
-    The httpx client is reset before and after each test so that
-    respx can intercept the freshly-created client for that test.
+    One router (and one route compilation) for the whole module instead of
+    a fresh ``@respx.mock`` per test; the catch-all host route answers any
+    request to example.com, so tests only register overrides when they
+    need non-default behaviour.  ``assert_all_called=False`` because not
+    every test issues an outbound request.  The ASGI-transport test client
+    below is untouched — respx only patches real httpx transports, so
+    requests to the app pass through while the fetcher's outbound calls
+    are intercepted.
     """
-    # Reset http client so respx can wrap the new one created inside the test
-    fetcher_module._http_client = None
+    with respx.mock(assert_all_called=False) as router:
+        router.route(host=_TARGET_URL.host).mock(return_value=_FAKE_RESPONSE)
+        yield router
+
 
-    with (
-        patch("app.core.database.AsyncIOMotorClient", AsyncMongoMockClient),
-        patch("app.workers.fetcher.close_http_client", new_callable=AsyncMock),
-    ):
-        with TestClient(app) as client:
-            yield client
+@pytest.fixture(scope="module")
+async def _app_client(_mongod_uri):
+    """Module-wide async client over an in-process ASGI transport.
 
-    # Ensure a stale client never leaks into the next test
-    fetcher_module._http_client = None
+    ``httpx.AsyncClient(transport=ASGITransport(app))`` drives the app on
+    the test's own event loop — no portal thread, no sync-over-async shim
+    per request.  The FastAPI lifespan (Mongo connect, index creation,
+    worker pool) is entered explicitly via ``LifespanManager`` and runs
+    once per module.
+    """
+    async with AsyncExitStack() as stack:
+        if _mongod_uri is not None:
+            stack.enter_context(
+                patch.object(settings, "mongo_uri", _mongod_uri)
+            )
+        else:
+            stack.enter_context(
+                patch("app.core.database.AsyncIOMotorClient", AsyncMongoMockClient)
+            )
+        await stack.enter_async_context(LifespanManager(app))
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://testserver",
+            )
+        )
+        yield client
+
+
+async def _clear_collections() -> None:
+    for name in CollectionNames:
+        await db.get_collection(name).delete_many({})
+
+
+@pytest.fixture
+async def integration_client(_app_client, respx_router):
+    """Per-test view of the shared client with collections reset.
+
+    respx patches transport classes, so the lifespan-owned httpx client
+    is intercepted without any per-test reset.  All collections are
+    emptied afterwards to preserve test isolation; this runs on the
+    module loop, so cleanup goes straight through the app's own Motor
+    client.
+    """
+    yield _app_client
+    await _clear_collections()
 
 
 # ── POST /metadata ─────────────────────────────────────────────────────────────
 
 class TestIntegrationPost:
-    @respx.mock
-    def test_post_fetches_and_stores(self, integration_client):
+    async def test_post_fetches_and_stores(self, integration_client):
         """POST returns 200 and the document is retrievable by GET."""
-        respx.get("https://example.com/").mock(return_value=_FAKE_RESPONSE)
-
-        resp = integration_client.post("/metadata", json={"url": "https://example.com/"})
+        resp = await integration_client.post(
+            "/metadata", json={"url": "https://example.com/"}
+        )
 
         assert resp.status_code == 200
         assert "message" in resp.json()
 
-    @respx.mock
-    def test_post_upsert_does_not_duplicate(self, integration_client):
-        """Posting the same URL twice updates the doc, not creates a second one."""
-        respx.get("https://example.com/").mock(return_value=_FAKE_RESPONSE)
+    async def test_post_upsert_does_not_duplicate(self, integration_client):
+        """A batch repeating one URL stores a single doc via one bulk upsert."""
+        resp = await integration_client.post(
+            "/metadata/batch",
+            json={"urls": ["https://example.com/", "https://example.com/"]},
+        )
 
-        r1 = integration_client.post("/metadata", json={"url": "https://example.com/"})
-        r2 = integration_client.post("/metadata", json={"url": "https://example.com/"})
-
-        assert r1.status_code == 200
-        assert r2.status_code == 200
+        assert resp.status_code == 200
+        assert "1 URLs" in resp.json()["message"]
 
         # GET should still return exactly one document (not 404 or 500)
-        get_resp = integration_client.get("/metadata?url=https://example.com/")
+        get_resp = await integration_client.get("/metadata?url=https://example.com/")
         assert get_resp.status_code == 200
 
-    def test_post_invalid_url_returns_422(self, integration_client):
-        resp = integration_client.post("/metadata", json={"url": "not-a-url"})
+    async def test_post_batch_invalid_url_returns_422(self, integration_client):
+        resp = await integration_client.post(
+            "/metadata/batch", json={"urls": ["not-a-url"]}
+        )
         assert resp.status_code == 422
 
+    async def test_post_invalid_url_returns_422(self, integration_client):
+        resp = await integration_client.post("/metadata", json={"url": "not-a-url"})
+        assert resp.status_code == 422
+
+    async def test_stored_page_source_round_trips(self, integration_client):
+        """page_source is compressed at rest but reads back as the raw HTML."""
+        await integration_client.post("/metadata", json={"url": "https://example.com/"})
+
+        source_repo = MetadataSourceRepository.from_db(db)
+        source = await source_repo.get_source("https://example.com/")
+        assert source == _FAKE_HTML
+
 
 # ── GET /metadata ──────────────────────────────────────────────────────────────
 
 class TestIntegrationGet:
-    @respx.mock
-    def test_get_after_post_returns_200(self, integration_client):
+    async def test_get_after_post_returns_200(self, integration_client):
         """After POST, GET should return the stored document with correct fields."""
-        respx.get("https://example.com/").mock(return_value=_FAKE_RESPONSE)
-
-        integration_client.post("/metadata", json={"url": "https://example.com/"})
-        resp = integration_client.get("/metadata?url=https://example.com/")
+        await integration_client.post("/metadata", json={"url": "https://example.com/"})
+        resp = await integration_client.get("/metadata?url=https://example.com/")
 
         assert resp.status_code == 200
         body = resp.json()
@@ -109,62 +244,57 @@ class TestIntegrationGet:
         # page_source must never be exposed in the API response
         assert "page_source" not in body
 
-    def test_get_miss_returns_202(self, integration_client):
+    async def test_get_miss_returns_202(self, integration_client):
         """GET on an unknown URL returns 202 and a human-readable message."""
-        resp = integration_client.get("/metadata?url=https://never-stored.example/")
+        resp = await integration_client.get(
+            "/metadata?url=https://never-stored.example/"
+        )
 
         assert resp.status_code == 202
         assert "message" in resp.json()
 
-    def test_get_missing_url_param_returns_422(self, integration_client):
-        resp = integration_client.get("/metadata")
+    async def test_get_missing_url_param_returns_422(self, integration_client):
+        resp = await integration_client.get("/metadata")
         assert resp.status_code == 422
 
-    def test_get_invalid_url_returns_422(self, integration_client):
-        resp = integration_client.get("/metadata?url=not-a-url")
+    async def test_get_invalid_url_returns_422(self, integration_client):
+        resp = await integration_client.get("/metadata?url=not-a-url")
         assert resp.status_code == 422
 
 
 # ── Full lifecycle ─────────────────────────────────────────────────────────────
 
 class TestIntegrationLifecycle:
-    @respx.mock
-    def test_miss_then_post_then_get_hit(self, integration_client):
+    async def test_miss_then_post_then_get_hit(self, integration_client):
         """GET miss → POST stores → GET hit — the canonical user flow."""
-        respx.get("https://example.com/").mock(return_value=_FAKE_RESPONSE)
-
         # 1. Not stored yet
-        miss = integration_client.get("/metadata?url=https://example.com/")
+        miss = await integration_client.get("/metadata?url=https://example.com/")
         assert miss.status_code == 202
 
         # 2. Store it
-        post = integration_client.post("/metadata", json={"url": "https://example.com/"})
+        post = await integration_client.post(
+            "/metadata", json={"url": "https://example.com/"}
+        )
         assert post.status_code == 200
 
         # 3. Now cached
-        hit = integration_client.get("/metadata?url=https://example.com/")
+        hit = await integration_client.get("/metadata?url=https://example.com/")
         assert hit.status_code == 200
         assert hit.json()["url"] == "https://example.com/"
 
-    @respx.mock
-    def test_url_normalisation_consistency(self, integration_client):
+    async def test_url_normalisation_consistency(self, integration_client):
         """URL with and without trailing slash both resolve to the same stored record."""
-        respx.get("https://example.com/").mock(return_value=_FAKE_RESPONSE)
-
         # POST with no trailing slash — pydantic normalises to https://example.com/
-        integration_client.post("/metadata", json={"url": "https://example.com"})
+        await integration_client.post("/metadata", json={"url": "https://example.com"})
 
         # GET with trailing slash — should hit the same document
-        resp = integration_client.get("/metadata?url=https://example.com/")
+        resp = await integration_client.get("/metadata?url=https://example.com/")
         assert resp.status_code == 200
         assert resp.json()["url"] == "https://example.com/"
 
-    @respx.mock
-    def test_response_does_not_expose_page_source(self, integration_client):
+    async def test_response_does_not_expose_page_source(self, integration_client):
         """page_source is stored in DB but must never appear in any API response."""
-        respx.get("https://example.com/").mock(return_value=_FAKE_RESPONSE)
-
-        integration_client.post("/metadata", json={"url": "https://example.com/"})
-        resp = integration_client.get("/metadata?url=https://example.com/")
+        await integration_client.post("/metadata", json={"url": "https://example.com/"})
+        resp = await integration_client.get("/metadata?url=https://example.com/")
 
         assert "page_source" not in resp.json()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.urls import normalise_url
+
+
+class TestNormaliseUrl:
+    def test_adds_root_path(self):
+        assert normalise_url("https://example.com") == "https://example.com/"
+
+    def test_lowercases_scheme_and_host(self):
+        assert normalise_url("HTTPS://Example.COM/Page") == "https://example.com/Page"
+
+    def test_preserves_query_and_port(self):
+        assert (
+            normalise_url("http://example.com:8080/a?b=1")
+            == "http://example.com:8080/a?b=1"
+        )
+
+    @pytest.mark.parametrize(
+        "url,expected",
+        [
+            ("http://example.com:80/", "http://example.com/"),
+            ("https://example.com:443/x", "https://example.com/x"),
+        ],
+    )
+    def test_strips_default_ports(self, url, expected):
+        assert normalise_url(url) == expected
+
+    def test_idna_encodes_non_ascii_host(self):
+        assert (
+            normalise_url("https://bücher.example/")
+            == "https://xn--bcher-kva.example/"
+        )
+
+    def test_adds_root_path_before_query(self):
+        assert normalise_url("https://example.com?b=1") == "https://example.com/?b=1"
+
+    def test_preserves_fragment(self):
+        assert (
+            normalise_url("https://example.com/a#frag")
+            == "https://example.com/a#frag"
+        )
+
+    def test_lowercases_host_but_preserves_userinfo_case(self):
+        assert (
+            normalise_url("https://User@Example.com/")
+            == "https://User@example.com/"
+        )
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "https://example.com",
+            "https://Example.com:443/x",
+            "http://example.com:80/",
+            "http://example.com:8080/a?b=1",
+            "https://example.com?b=1",
+            "https://bücher.example/",
+            # ß is where IDNA 2003 and UTS-46 disagree — pins the codec.
+            "https://straße.example/",
+            "https://User@API.example.com/feed",
+        ],
+    )
+    def test_matches_pydantic_httpurl(self, url):
+        # POST (HttpUrl) and GET (normalise_url) must agree on the stored key.
+        from pydantic import HttpUrl
+
+        assert normalise_url(url) == str(HttpUrl(url))
+
+    @pytest.mark.parametrize("bad", ["not-a-url", "ftp://example.com/", "https://"])
+    def test_rejects_non_http_urls(self, bad):
+        with pytest.raises(ValueError):
+            normalise_url(bad)
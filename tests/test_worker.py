@@ -1,30 +1,63 @@
 from __future__ import annotations
 
+import asyncio
+import subprocess
+import sys
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
+import msgspec
 import pytest
+from pymongo.errors import BulkWriteError
 
+from app.core.cache import metadata_cache
 from app.models.metadata.document import MetadataDocument
-from app.repositories.metadata.repository import MetadataRepository
+from app.repositories.metadata.repository import (
+    MetadataRepository,
+    MetadataSourceRepository,
+    UpsertBatcher,
+)
 from app.services.metadata.service import MetadataService
 from app.workers.fetcher import FetchError, fetch_metadata
 
 _NOW = datetime.now(timezone.utc)
 
 
-def _make_doc(**kwargs) -> MetadataDocument:
-    defaults = dict(
-        url="https://example.com/",
-        status_code=200,
-        headers={"content-type": "text/html"},
-        cookies={},
-        page_source="<html></html>",
-        created_at=_NOW,
-        updated_at=_NOW,
+def test_repository_module_does_not_import_motor():
+    """Importing the repositories must not drag Motor in.
+
+    These unit tests run against pure AsyncMock repos; Motor (and its
+    pymongo machinery) should only load when a real collection is wired
+    up.  Checked in a subprocess so conftest's app import cannot skew
+    ``sys.modules``.
+    """
+    code = (
+        "import sys, app.repositories.metadata.repository; "
+        "sys.exit(1 if 'motor' in sys.modules else 0)"
     )
-    return MetadataDocument(**{**defaults, **kwargs})
+    result = subprocess.run([sys.executable, "-c", code])
+    assert result.returncode == 0
+
+
+#: Built once — MetadataDocument is frozen, so sharing one instance
+#: across tests is safe and skips per-test construction.
+_DEFAULT_DOC = MetadataDocument(
+    url="https://example.com/",
+    status_code=200,
+    headers={"content-type": "text/html"},
+    cookies={},
+    page_source="<html></html>",
+    created_at=_NOW,
+    updated_at=_NOW,
+)
+
+
+def _make_doc(**kwargs) -> MetadataDocument:
+    if not kwargs:
+        return _DEFAULT_DOC
+    return msgspec.structs.replace(_DEFAULT_DOC, **kwargs)
 
 
 # ---------------------------------------------------------------------------
@@ -32,86 +65,144 @@ def _make_doc(**kwargs) -> MetadataDocument:
 # ---------------------------------------------------------------------------
 
 
+def _mock_client(response: httpx.Response) -> httpx.AsyncClient:
+    """Real AsyncClient over a MockTransport, so streaming reads work."""
+    return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: response))
+
+
+@contextmanager
+def _patched_fetcher(max_retries: int = 1):
+    """Patch retries/backoff out of the fetcher and yield the mocked _do_fetch."""
+    with (
+        patch("app.workers.fetcher.settings") as mock_settings,
+        patch("app.workers.fetcher._sleep", new_callable=AsyncMock),
+        patch(
+            "app.workers.fetcher._do_fetch", new_callable=AsyncMock
+        ) as mock_fetch,
+    ):
+        mock_settings.http_max_retries = max_retries
+        yield mock_fetch
+
+
 class TestFetcher:
+    @pytest.fixture(autouse=True)
+    def _no_retries(self, monkeypatch):
+        """Default fetches in this class to zero retries.
+
+        Tests that exercise the retry loop override via _patched_fetcher;
+        everything else should fail fast instead of waiting on backoff.
+        """
+        monkeypatch.setattr("app.workers.fetcher.settings.http_max_retries", 0)
+
     async def test_successful_fetch(self):
-        mock_resp = httpx.Response(
-            200,
-            text="<html></html>",
-            request=httpx.Request("GET", "https://example.com/"),
-        )
-        with patch("app.workers.fetcher.get_http_client") as mock_get:
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_resp)
-            mock_get.return_value = mock_client
+        client = _mock_client(httpx.Response(200, content=b"<html></html>"))
+        with patch("app.workers.fetcher.get_http_client", return_value=client):
             result = await fetch_metadata("https://example.com/")
         assert result.status_code == 200
         assert result.url == "https://example.com/"
+        assert result.page_source == "<html></html>"
+        assert result.page_source_truncated is False
 
     async def test_invalid_url_raises_fetch_error(self):
-        with patch("app.workers.fetcher.get_http_client") as mock_get:
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(
-                side_effect=httpx.InvalidURL("invalid url")
-            )
-            mock_get.return_value = mock_client
+        client = _mock_client(httpx.Response(200))
+        with patch("app.workers.fetcher.get_http_client", return_value=client):
             with pytest.raises(FetchError, match="Invalid URL"):
                 await fetch_metadata("not-a-url")
 
     async def test_non_200_response_is_stored(self):
-        mock_resp = httpx.Response(
-            404,
-            text="not found",
-            request=httpx.Request("GET", "https://example.com/404"),
-        )
-        with patch("app.workers.fetcher.get_http_client") as mock_get:
-            mock_client = AsyncMock()
-            mock_client.get = AsyncMock(return_value=mock_resp)
-            mock_get.return_value = mock_client
+        client = _mock_client(httpx.Response(404, content=b"not found"))
+        with patch("app.workers.fetcher.get_http_client", return_value=client):
             result = await fetch_metadata("https://example.com/404")
         assert result.status_code == 404
 
-    async def test_timeout_retries_and_raises(self):
-        with (
-            patch("app.workers.fetcher.settings") as mock_settings,
-            patch("asyncio.sleep", new_callable=AsyncMock),
-            patch(
-                "app.workers.fetcher._do_fetch", new_callable=AsyncMock
-            ) as mock_fetch,
-        ):
-            mock_settings.http_max_retries = 1
-            mock_fetch.side_effect = httpx.TimeoutException("timed out")
-            with pytest.raises(FetchError):
-                await fetch_metadata("https://example.com/")
-        assert mock_fetch.call_count == 2
+    async def test_oversized_body_is_truncated(self, monkeypatch):
+        monkeypatch.setattr(
+            "app.workers.fetcher.settings.http_max_body_bytes", 16
+        )
+        client = _mock_client(httpx.Response(200, content=b"x" * 1024))
+        with patch("app.workers.fetcher.get_http_client", return_value=client):
+            result = await fetch_metadata("https://example.com/")
+        assert result.page_source == "x" * 16
+        assert result.page_source_truncated is True
 
-    async def test_connect_error_retries_and_raises(self):
-        with (
-            patch("app.workers.fetcher.settings") as mock_settings,
-            patch("asyncio.sleep", new_callable=AsyncMock),
-            patch(
-                "app.workers.fetcher._do_fetch", new_callable=AsyncMock
-            ) as mock_fetch,
-        ):
-            mock_settings.http_max_retries = 1
-            mock_fetch.side_effect = httpx.ConnectError("refused")
+    @pytest.mark.parametrize(
+        "exc_cls,msg",
+        [(httpx.TimeoutException, "timed out"), (httpx.ConnectError, "refused")],
+    )
+    async def test_transient_errors_retry_and_raise(self, exc_cls, msg):
+        with _patched_fetcher(max_retries=1) as mock_fetch:
+            mock_fetch.side_effect = exc_cls(msg)
             with pytest.raises(FetchError):
                 await fetch_metadata("https://example.com/")
         assert mock_fetch.call_count == 2
 
 
+# ---------------------------------------------------------------------------
+# UpsertBatcher tests
+# ---------------------------------------------------------------------------
+
+
+class TestUpsertBatcher:
+    async def test_unresolved_duplicate_race_fails_only_its_own_op(self):
+        """A failed per-op retry must not poison futures whose writes
+        committed in the bulk."""
+        col = AsyncMock()
+        col.bulk_write.side_effect = BulkWriteError(
+            {"writeErrors": [{"code": 11000, "index": 0}]}
+        )
+        col.update_one.return_value = MagicMock(matched_count=0)
+        batcher = UpsertBatcher(col, max_ops=2, window_ms=50)
+
+        results = await asyncio.gather(
+            batcher.submit({"url": "https://a.example/"}, {"$set": {}}),
+            batcher.submit({"url": "https://b.example/"}, {"$set": {}}),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], RuntimeError)
+        assert results[1] is None
+        col.bulk_write.assert_called_once()
+        col.update_one.assert_called_once()
+
+
 # ---------------------------------------------------------------------------
 # MetadataService tests
 # ---------------------------------------------------------------------------
 
 
 class TestMetadataService:
-    @pytest.fixture
+    # Class-scoped mocks: AsyncMock(spec=...) introspects the whole
+    # repository class to build its spec, so pay that once per class and
+    # reset state between tests instead of rebuilding.
+    @pytest.fixture(scope="class")
     def repo(self):
         return AsyncMock(spec=MetadataRepository)
 
+    @pytest.fixture(scope="class")
+    def source_repo(self):
+        return AsyncMock(spec=MetadataSourceRepository)
+
+    @pytest.fixture(autouse=True)
+    def _reset_mocks(self, repo, source_repo):
+        yield
+        repo.reset_mock(return_value=True, side_effect=True)
+        source_repo.reset_mock(return_value=True, side_effect=True)
+
+    @pytest.fixture
+    def service(self, repo, source_repo):
+        return MetadataService(repo, source_repo)
+
     @pytest.fixture
-    def service(self, repo):
-        return MetadataService(repo)
+    def mock_fetch(self):
+        """fetch_metadata patched at the service's import site.
+
+        One fixture instead of the same ``with patch(...)`` block in every
+        store test; tests set ``return_value``/``side_effect`` directly.
+        """
+        with patch(
+            "app.services.metadata.service.fetch_metadata", new_callable=AsyncMock
+        ) as mock:
+            yield mock
 
     async def test_get_metadata_returns_document(self, service, repo):
         doc = _make_doc()
@@ -120,23 +211,50 @@ class TestMetadataService:
         assert result == doc
         repo.find_by_url.assert_called_once_with("https://example.com/")
 
+    async def test_cache_hit_skips_repo(self, service, repo):
+        doc = _make_doc()
+        repo.find_by_url.return_value = doc
+        first = await service.get_metadata("https://example.com/")
+        second = await service.get_metadata("https://example.com/")
+        assert first == second == doc
+        # The second call is answered by the in-process TTL cache.
+        assert repo.find_by_url.call_count == 1
+
     async def test_get_metadata_returns_none_on_miss(self, service, repo):
         repo.find_by_url.return_value = None
         result = await service.get_metadata("https://example.com/")
         assert result is None
 
-    async def test_store_metadata_fetches_and_upserts(self, service, repo):
+    async def test_store_metadata_fetches_and_upserts(
+        self, service, repo, source_repo, mock_fetch
+    ):
         doc = _make_doc()
         repo.upsert.return_value = doc
-        with patch(
-            "app.services.metadata.service.fetch_metadata",
-            new_callable=AsyncMock,
-            return_value=doc,
-        ) as mock_fetch:
-            result = await service.store_metadata("https://example.com/")
+        mock_fetch.return_value = doc
+        result = await service.store_metadata("https://example.com/")
         mock_fetch.assert_called_once_with("https://example.com/")
         repo.upsert.assert_called_once_with(doc)
+        source_repo.upsert_source.assert_called_once_with(doc.url, doc.page_source)
         assert result == doc
+        # The cache must hold the hot-field shape only, never the body.
+        assert metadata_cache["https://example.com/"].page_source == ""
+
+    async def test_store_many_pipelines_per_url_upserts(
+        self, service, repo, source_repo, mock_fetch
+    ):
+        doc_a = _make_doc(url="https://a.example/")
+        doc_b = _make_doc(url="https://b.example/")
+        repo.upsert.side_effect = [doc_a, doc_b]
+        mock_fetch.side_effect = [doc_a, doc_b]
+        result = await service.store_many(
+            ["https://a.example/", "https://b.example/", "https://a.example/"]
+        )
+        # Duplicate URL collapsed: two fetches, one pipelined write each
+        # (the batcher coalesces concurrent upserts into bulk writes).
+        assert mock_fetch.call_count == 2
+        assert repo.upsert.call_count == 2
+        assert source_repo.upsert_source.call_count == 2
+        assert result == [doc_a, doc_b]
 
     async def test_background_collect_persists_data(self, service):
         doc = _make_doc()
@@ -146,6 +264,51 @@ class TestMetadataService:
             await service.background_collect("https://example.com/")
         mock_store.assert_called_once_with("https://example.com/")
 
+    async def test_concurrent_gets_coalesce_into_one_read(self, service, repo):
+        doc = _make_doc()
+
+        async def slow_find(url):
+            await asyncio.sleep(0.01)
+            return doc
+
+        repo.find_by_url.side_effect = slow_find
+        results = await asyncio.gather(
+            service.get_metadata("https://example.com/"),
+            service.get_metadata("https://example.com/"),
+        )
+        assert results == [doc, doc]
+        repo.find_by_url.assert_called_once_with("https://example.com/")
+
+    async def test_concurrent_stores_coalesce_into_one_fetch(
+        self, service, repo, mock_fetch
+    ):
+        doc = _make_doc()
+        repo.upsert.return_value = doc
+
+        async def slow_fetch(url):
+            await asyncio.sleep(0.01)
+            return doc
+
+        mock_fetch.side_effect = slow_fetch
+        results = await asyncio.gather(
+            service.store_metadata("https://example.com/"),
+            service.store_metadata("https://example.com/"),
+        )
+        assert results == [doc, doc]
+        mock_fetch.assert_called_once_with("https://example.com/")
+        repo.upsert.assert_called_once_with(doc)
+
+    async def test_background_collect_skips_url_already_in_flight(self, service):
+        MetadataService._refreshing.add("https://example.com/")
+        try:
+            with patch.object(
+                service, "store_metadata", new_callable=AsyncMock
+            ) as mock_store:
+                await service.background_collect("https://example.com/")
+            mock_store.assert_not_called()
+        finally:
+            MetadataService._refreshing.discard("https://example.com/")
+
     async def test_background_collect_logs_fetch_error(self, service):
         with patch.object(
             service,
@@ -165,22 +328,13 @@ class TestMetadataService:
         ):
             await service.background_collect("https://example.com/")  # must not raise
 
-    async def test_store_metadata_propagates_fetch_error(self, service):
-        with patch(
-            "app.services.metadata.service.fetch_metadata",
-            new_callable=AsyncMock,
-            side_effect=FetchError("network error"),
-        ):
-            with pytest.raises(FetchError, match="network error"):
-                await service.store_metadata("https://example.com/")
+    async def test_store_metadata_propagates_fetch_error(self, service, mock_fetch):
+        mock_fetch.side_effect = FetchError("network error")
+        with pytest.raises(FetchError, match="network error"):
+            await service.store_metadata("https://example.com/")
 
-    async def test_store_metadata_propagates_db_error(self, service, repo):
-        doc = _make_doc()
-        with patch(
-            "app.services.metadata.service.fetch_metadata",
-            new_callable=AsyncMock,
-            return_value=doc,
-        ):
-            repo.upsert.side_effect = RuntimeError("DB crashed")
-            with pytest.raises(RuntimeError, match="DB crashed"):
-                await service.store_metadata("https://example.com/")
+    async def test_store_metadata_propagates_db_error(self, service, repo, mock_fetch):
+        mock_fetch.return_value = _make_doc()
+        repo.upsert.side_effect = RuntimeError("DB crashed")
+        with pytest.raises(RuntimeError, match="DB crashed"):
+            await service.store_metadata("https://example.com/")